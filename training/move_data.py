@@ -1,15 +1,24 @@
 import argparse
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from shutil import copy2
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 import nibabel as nib
 import numpy as np
 import pandas as pd
 from nnunetv2.dataset_conversion.generate_dataset_json import generate_dataset_json
 from tqdm import tqdm
-from util import BodyParts, BodyRegions, load_nibabel_image_with_axcodes
+from util import label_map_for, load_array_with_axcodes
+
+
+def _save_slice_pair(
+    task: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Path, Path],
+) -> None:
+    img_slice, label_slice, img_affine, label_affine, img_path, label_path = task
+    nib.save(nib.Nifti1Image(img_slice, img_affine), img_path)
+    nib.save(nib.Nifti1Image(label_slice, label_affine), label_path)
 
 
 def generate_dataset(
@@ -18,17 +27,11 @@ def generate_dataset(
     info_df: pd.DataFrame,
     dataset: str,
 ) -> None:
+    label_map = dict(label_map_for(dataset, include_background=True))
     if dataset == "regions":
-        label_map = {
-            BodyRegions(i).name.lower(): int(BodyRegions(i))
-            for i in sorted(BodyRegions)
-        }
         filename = "body-regions.nii.gz"
         number = 557
     else:
-        label_map = {
-            BodyParts(i).name.lower(): int(BodyParts(i)) for i in sorted(BodyParts)
-        }
         filename = "body-parts.nii.gz"
         number = 558
 
@@ -45,6 +48,14 @@ def generate_dataset(
     splits: List[Dict[str, List]] = []
     for _ in range(5):
         splits.append({"train": [], "val": []})
+    # Two directories per split instead of a mkdir per written slice.
+    for split_suffix in ("Tr", "Ts"):
+        (target_dir / f"images{split_suffix}").mkdir(parents=True, exist_ok=True)
+        (target_dir / f"labels{split_suffix}").mkdir(parents=True, exist_ok=True)
+
+    # gzip inside nib.save releases the GIL, so the per-slice writes of a
+    # subject run concurrently; the split bookkeeping stays in this thread.
+    executor = ThreadPoolExecutor(max_workers=os.cpu_count())
     for row in tqdm(info_df.itertuples(), total=len(info_df)):
         old_img = source_root / row.id / "image.nii.gz"
         old_label = source_root / row.id / filename
@@ -53,24 +64,32 @@ def generate_dataset(
             split = "Tr"
         elif row.split == "test":
             split = "Ts"
-            # Copy the entire image and entire label such that we can use them for evaluation later
+            # Save the entire image and entire label such that we can use them
+            # for evaluation later. Re-saved uncompressed instead of copied:
+            # nnUNetv2_predict lists its inputs (and names its predictions)
+            # by the trained model's .nii file ending, so the eval volumes
+            # have to carry the same ending as the raw dataset.
             eval_dir_img = eval_dir / "imagesTs"
             eval_dir_label = eval_dir / "labelsTs"
             eval_dir_img.mkdir(exist_ok=True, parents=True)
             eval_dir_label.mkdir(exist_ok=True, parents=True)
-            copy2(old_img, eval_dir_img / f"{row.id}_0000.nii.gz")
-            copy2(old_label, eval_dir_label / f"{row.id}.nii.gz")
+            nib.save(nib.load(old_img), eval_dir_img / f"{row.id}_0000.nii")
+            nib.save(nib.load(old_label), eval_dir_label / f"{row.id}.nii")
         else:
             raise ValueError(row.split)
 
-        img_nib = load_nibabel_image_with_axcodes(nib.load(old_img))
-        img = img_nib.get_fdata()
-        label_nib = load_nibabel_image_with_axcodes(nib.load(old_label))
-        label = label_nib.get_fdata()
-        # print(label.shape)
-        # Get only the z slices that do not have 255
-        annotated_slices = np.where(np.all(label != 255, axis=(0, 1)))[0]
-        # print(annotated_slices)
+        # load_array_with_axcodes reads through dataobj, keeping the native
+        # on-disk dtype - int16 for the CTs, so the slice writes gzip a
+        # quarter of the float64 bytes; uint8 is enough for the label
+        # values (sparse marker 255 included).
+        img, img_affine = load_array_with_axcodes(nib.load(old_img))
+        label, label_affine = load_array_with_axcodes(nib.load(old_label))
+        label = np.asarray(label, dtype=np.uint8)
+        # Get only the z slices that do not have 255; any() stops per
+        # column as soon as a 255 shows up instead of reducing a full
+        # boolean volume with all().
+        annotated_slices = np.nonzero(~np.any(label == 255, axis=(0, 1)))[0]
+        pairs = []
         for sl in annotated_slices:
             img_sl = img[..., sl]
             label_sl = label[..., sl]
@@ -83,16 +102,17 @@ def generate_dataset(
                 for i in range(5):
                     if i != fold_id:
                         splits[i]["train"].append(new_id)
-            new_img = target_dir / f"images{split}" / f"{new_id}_0000.nii.gz"
-            new_label = target_dir / f"labels{split}" / f"{new_id}.nii.gz"
-
-            new_img.parent.mkdir(parents=True, exist_ok=True)
-            new_label.parent.mkdir(parents=True, exist_ok=True)
-
-            new_img_nib = nib.Nifti1Image(img_sl, img_nib.affine)
-            new_label_nib = nib.Nifti1Image(label_sl, label_nib.affine)
-            nib.save(new_img_nib, new_img)
-            nib.save(new_label_nib, new_label)
+            # Uncompressed .nii: tens of thousands of tiny slice files make
+            # the per-file gzip the dominant cost, and nnU-Net re-reads
+            # them constantly during preprocessing/training anyway.
+            new_img = target_dir / f"images{split}" / f"{new_id}_0000.nii"
+            new_label = target_dir / f"labels{split}" / f"{new_id}.nii"
+            pairs.append(
+                (img_sl, label_sl, img_affine, label_affine, new_img, new_label)
+            )
+        # Drain before the next subject so at most one volume is pinned.
+        list(executor.map(_save_slice_pair, pairs))
+    executor.shutdown()
 
     with (preprocessed_dir / "splits_final.json").open("w") as f:
         json.dump(splits, f)
@@ -102,7 +122,7 @@ def generate_dataset(
         channel_names={0: "CT"},
         labels=label_map,
         num_training_cases=num_training_cases,
-        file_ending=".nii.gz",
+        file_ending=".nii",
         dataset_name=task_name,
         license="hands off!",
         dataset_release="v3",
@@ -1,6 +1,8 @@
 import enum
+from typing import Tuple
 
 import nibabel as nib
+import numpy as np
 
 
 def load_nibabel_image_with_axcodes(
@@ -16,6 +18,27 @@ def load_nibabel_image_with_axcodes(
     return image
 
 
+def load_array_with_axcodes(
+    image: nib.nifti1.Nifti1Image, axcodes: str = "RAS"
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Data array and affine of ``image`` reoriented to ``axcodes``.
+
+    Unlike as_reoriented this never builds an intermediate Nifti1Image;
+    the flips/transposes are applied to the array directly and already
+    oriented volumes come back as the untouched proxy read.
+    """
+    array = np.asanyarray(image.dataobj)
+    input_axcodes = "".join(nib.aff2axcodes(image.affine))
+    axcodes = "".join(axcodes)
+    if input_axcodes == axcodes:
+        return array, image.affine
+    input_ornt = nib.orientations.axcodes2ornt(input_axcodes)
+    expected_ornt = nib.orientations.axcodes2ornt(axcodes)
+    transform = nib.orientations.ornt_transform(input_ornt, expected_ornt)
+    affine = image.affine.dot(nib.orientations.inv_ornt_aff(transform, array.shape))
+    return nib.orientations.apply_orientation(array, transform), affine
+
+
 def convert_nibabel_to_original_with_axcodes(
     image_transformed: nib.nifti1.Nifti1Image,
     image_original: nib.nifti1.Nifti1Image,
@@ -27,6 +50,19 @@ def convert_nibabel_to_original_with_axcodes(
     return image_transformed.as_reoriented(from_canonical)
 
 
+def bbox_of_union(mask1: np.ndarray, mask2: np.ndarray) -> Tuple[slice, ...]:
+    """Bounding box (as slices) of the union of two non-empty boolean masks."""
+    slices = []
+    for axis in range(mask1.ndim):
+        other_axes = tuple(i for i in range(mask1.ndim) if i != axis)
+        present = np.logical_or(
+            np.any(mask1, axis=other_axes), np.any(mask2, axis=other_axes)
+        )
+        indices = np.nonzero(present)[0]
+        slices.append(slice(int(indices[0]), int(indices[-1]) + 1))
+    return tuple(slices)
+
+
 class BodyRegions(enum.IntEnum):
     BACKGROUND = 0
     SUBCUTANEOUS_TISSUE = 1
@@ -52,3 +88,32 @@ class BodyParts(enum.IntEnum):
     LEFT_LEG = 4
     RIGHT_ARM = 5
     LEFT_ARM = 6
+
+
+# Precomputed once at import so the evaluation loop (and its workers)
+# iterate plain (name, index) pairs instead of enum lookups.
+REGION_MAP = tuple(
+    (region.name.lower(), int(region))
+    for region in BodyRegions
+    if region != BodyRegions.BACKGROUND
+)
+PART_MAP = tuple(
+    (part.name.lower(), int(part)) for part in BodyParts if part != BodyParts.BACKGROUND
+)
+_REGION_MAP_FULL = ((BodyRegions.BACKGROUND.name.lower(), 0),) + REGION_MAP
+_PART_MAP_FULL = ((BodyParts.BACKGROUND.name.lower(), 0),) + PART_MAP
+
+
+def label_map_for(
+    dataset: str, include_background: bool = False
+) -> Tuple[Tuple[str, int], ...]:
+    """Precomputed (name, index) pairs for a dataset name.
+
+    Evaluation iterates the foreground labels only; dataset generation
+    needs the background entry for the nnU-Net dataset json.
+    """
+    if dataset == "regions":
+        return _REGION_MAP_FULL if include_background else REGION_MAP
+    elif dataset == "parts":
+        return _PART_MAP_FULL if include_background else PART_MAP
+    raise ValueError("Invalid dataset")